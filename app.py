@@ -1,125 +1,495 @@
-from os import listdir as ls
-from os import mkdir, path, system
-from platform import system as currentOS
-import openpyxl
-import pandas as pd
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Pool
+from io import BytesIO
+from os import makedirs, path
+from tempfile import TemporaryDirectory
 from PyPDF2 import PdfReader, PdfWriter
-from datetime import datetime
 
 
-from extractMethods import (ErrorOnPDFHandle, ExtractMethodList,
-                            IncorrectMimeType)
+from asyncPipeline import AsyncPipeline
+from batchRecovery import Quarantine, RunCheckpoint
+from extractCache import ExtractionCache, dataHash
+from filePlacement import FilePlacer
+from folderScanner import FolderScanner, scanAhead
+from extractMethods import (TEXT_MODES, ErrorOnPDFHandle, ExtractionContext,
+                            IncorrectMimeType, OCRSettings,
+                            configureLayoutStats, configureOCR,
+                            extractFileData, iterPDFPagesText, textCacheKey)
+from layoutStats import LayoutStats
+from ocrEngine import OCR_ENGINES
+from processedManifest import ProcessedManifest
+from resultStore import ResultStore
+from resultTable import ResultTable
+from runMetrics import RunMetrics, metrics
+
+
+extraction_cache: ExtractionCache | None = None
+text_mode: str = 'grouped'
+fault_tolerant: bool = False
+
+
+def init_extraction(cache_folder: str | None, cache_max_mb: int, ocr_settings: OCRSettings,
+                    layout_stats: LayoutStats | None = None, mode: str = 'grouped', tolerant: bool = False):
+    global extraction_cache, text_mode, fault_tolerant
+    text_mode = mode
+    fault_tolerant = tolerant
+    configureOCR(ocr_settings)
+    configureLayoutStats(layout_stats)
+    if cache_folder is not None:
+        extraction_cache = ExtractionCache(cache_folder, cache_max_mb)
+    return extraction_cache
+
+
+def extract_file_data(job: tuple[str, bytes | None]):
+    file, data = job
+    context = ExtractionContext(file, 1, extraction_cache, None, text_mode, data)
+    metrics.count('arquivos')
+    with metrics.stage('extracao', file):
+        try:
+            data, err = extractFileData(context), None
+        except (ErrorOnPDFHandle, IncorrectMimeType) as error:
+            data, err = None, error
+        except Exception as error:
+            if not fault_tolerant:
+                raise
+            data, err = None, ErrorOnPDFHandle('', [f'file {file}', repr(error)])
+    return file, data, err, {'method': context.method, 'fingerprint': context.fingerprint, 'misses': context.misses,
+                             'hash': context.hash if err is None else None, 'metrics': metrics.drain()}
+
+
+def split_pdf_pages(job: tuple[str, str]):
+    pdf_path, output_stem = job
+    with metrics.stage('split_pdf_pages', pdf_path):
+        split_pages = split_pdf_file(pdf_path, output_stem)
+    return split_pages, metrics.drain()
+
+
+def split_pdf_file(pdf_path: str, output_stem: str):
+    pdf_reader = PdfReader(pdf_path)
+    pages_text = iterPDFPagesText(pdf_path, len(pdf_reader.pages))
+    makedirs(path.dirname(output_stem) or '.', exist_ok=True)
+    for page_num in range(len(pdf_reader.pages)):
+        page_text = None
+        if pages_text is not None:
+            try:
+                page_text = next(pages_text, None)
+            except Exception as e:
+                print(f'Texto de {pdf_path} será extraído após a divisão a partir da página {page_num + 1}: {e}')
+                pages_text = None
+        pdf_writer = PdfWriter()
+        pdf_writer.add_page(pdf_reader.pages[page_num])
+        page_pdf = BytesIO()
+        pdf_writer.write(page_pdf)
+        with open(f'{output_stem}_p{page_num + 1:04d}.pdf', "wb") as output_pdf:
+            output_pdf.write(page_pdf.getvalue())
+        if page_text is not None and extraction_cache is not None:
+            extraction_cache.putPagesText(dataHash(page_pdf.getvalue()), 1, textCacheKey('grouped'), [page_text[0]])
+    return len(pdf_reader.pages)
 
 
 class PDFManager:
-    def __init__(self, folder: str, split_files: bool = False) -> None:
+    def __init__(self, folder: str, split_files: bool = False, workers: int = 1,
+                 cache_folder: str | None = '.cache_extracao', cache_max_mb: int = 1024,
+                 rebuild_cache: bool = False, incremental: bool = False,
+                 ocr_settings: OCRSettings | None = None, parquet_file: str | None = None,
+                 placement: str = 'copy', trace_file: str | None = None,
+                 progress_interval: float = 2.0, text_mode: str = 'grouped',
+                 file_filter: str = 'extension', pipeline: str = 'sequential',
+                 read_concurrency: int = 4, place_concurrency: int = 4, queue_size: int = 64,
+                 batch: bool = False, resume: bool = False, checkpoint_every: int = 100,
+                 database_file: str | None = 'notas.sqlite3') -> None:
         pass
-        self.files: list[str] = []
+        self.metrics = RunMetrics(trace_file)
+        self.progress_interval = progress_interval
+        self.last_progress = 0.0
+        self.processed_count = 0
+        self.logged_count = 0
+        self.file_filter = file_filter
+        self.workers: int = max(1, workers)
+        self.layout_stats = LayoutStats()
+        batch = batch or resume
+        self.split_cache_folder = TemporaryDirectory() if split_files and cache_folder is None else None
+        if self.split_cache_folder is not None:
+            cache_folder = self.split_cache_folder.name
+        self.extraction_settings = (cache_folder, cache_max_mb, ocr_settings or OCRSettings(), self.layout_stats, text_mode, batch)
+        self.cache = init_extraction(*self.extraction_settings)
+        if self.cache is not None and rebuild_cache:
+            self.cache.clear()
         self.nome_pasta_onde_salvar: str = 'final'
+        self.placer = FilePlacer(placement)
         self.errorLogFile = open('error.log', '+a', encoding='utf8')
         self.folder: str = folder
         self.pre_folder: str = 'arquivos_pre'
-        self.set_table_file()
+        self.table_file_name: str = 'Relação de Notas x Cidades.xlsx'
+        self.manifest = ProcessedManifest() if incremental else None
+        self.quarantine = Quarantine('quarentena', folder) if batch else None
+        self.checkpoint = RunCheckpoint(folder, every=checkpoint_every) if batch else None
+        self.resuming = resume and self.checkpoint.load()
+        if resume and not self.resuming:
+            print('Nenhum checkpoint encontrado, processando desde o início')
+        self.set_table_file(parquet_file)
+        self.result_store = ResultStore(database_file) if database_file is not None else None
+        self.redone_files: set[str] = set()
+        if self.resuming:
+            self.table_file.resumeRows = self.checkpoint.rows
+            self.unconfirmed_files = self.table_file.filesFrom(self.checkpoint.rows)
+            print(f'Retomando após {self.checkpoint.lastFile}')
+        self.split_stems: set[str] = set()
+        self.reprocessed_files: set[str] = set()
+        self.rerun_files: set[str] = set()
+        self.untracked_rows = self.manifest is not None and self.has_untracked_rows()
+        self.dropped_count = 0
+        self.skipped_files = 0
         if split_files:
-            self.list_folder_files(self.pre_folder)
-            for file in self.files:
-                self.split_pdf_pages(file)
-            self.files.clear()
-        self.list_folder_files(self.folder)
-        self.get_file_data()
-        self.generate_table()
-
-
-    def split_pdf_pages(self, pdf_path: str):
-        pdf_reader = PdfReader(pdf_path)
-        for page_num in range(len(pdf_reader.pages)):
-            now = datetime.now()
-            pdf_writer = PdfWriter()
-            output_pdf_path = f"{self.folder}/page_{now.timestamp()}.pdf"
-            pdf_writer.add_page(pdf_reader.pages[page_num])
-            with open(output_pdf_path, "wb") as output_pdf:
-                pdf_writer.write(output_pdf)
-
-
-    def logProgress(self, actual, total):
+            self.split_pre_files(self.list_folder_files(self.pre_folder))
+        self.files = self.list_folder_files(self.folder)
+        if pipeline == 'async':
+            self.run_async_pipeline(read_concurrency, place_concurrency, queue_size)
+        else:
+            self.get_file_data()
+        if self.resuming:
+            self.table_file.removeFiles(self.redone_files, self.table_file.resumeRows)
+        if self.manifest is not None:
+            print(f'{self.skipped_files} arquivos já organizados, {len(self.reprocessed_files)} alterados')
+            self.table_file.removeFiles(self.rerun_files)
+            if self.imported_xlsx:
+                self.table_file.removeImportedDuplicates()
+        with self.metrics.stage('generate_table'):
+            self.generate_table()
+        print(self.metrics.summary())
+        self.metrics.close()
+        print(self.layout_stats.summary())
+        self.layout_stats.save()
+        if self.manifest is not None:
+            self.manifest.save()
+        if self.cache is not None:
+            self.cache.evict()
+            self.cache.close()
+        if self.split_cache_folder is not None:
+            self.split_cache_folder.cleanup()
+        if self.result_store is not None:
+            self.result_store.close()
+        if self.quarantine is not None:
+            print(f'{self.quarantine.isolated} arquivos movidos para {self.quarantine.folder}')
+            self.checkpoint.clear()
+
+
+    def split_pre_files(self, files: FolderScanner):
+        jobs = ((file, self.split_output_stem(file)) for file in scanAhead(files))
+        if self.workers == 1:
+            self.collect_split_pages(map(split_pdf_pages, jobs))
+            return
+        with Pool(self.workers, init_extraction, self.extraction_settings) as pool:
+            self.collect_split_pages(pool.imap(split_pdf_pages, jobs))
+
+
+    def split_output_stem(self, file: str):
+        stem = path.join(self.folder, path.splitext(path.relpath(file, self.pre_folder))[0])
+        unique_stem, copy = stem, 1
+        while unique_stem.lower() in self.split_stems:
+            unique_stem = f'{stem}_{copy}'
+            copy += 1
+        self.split_stems.add(unique_stem.lower())
+        return unique_stem
+
+
+    def collect_split_pages(self, results):
+        for split_pages, split_metrics in results:
+            self.metrics.merge(split_metrics)
+        self.exit_if_no_files(self.pre_folder, 0)
+
+
+    def logProgress(self, actual, total=None):
+        now = time.monotonic()
+        if (total is None or actual + 1 < total) and now - self.last_progress < self.progress_interval:
+            return
+        self.last_progress = now
+        self.logged_count = actual + 1
+        if total is None:
+            print(f'{actual+1} arquivos processados')
+            return
         print(f'{actual+1}/{total} - {(actual/total) * 100:.3f}%')
 
 
+    def logFinalProgress(self):
+        if self.processed_count != self.logged_count:
+            self.logged_count = self.processed_count
+            print(f'{self.processed_count} arquivos processados')
+
+
     def generate_table(self):
-        self.table_file.to_excel('Relação de Notas x Cidades.xlsx')
+        self.table_file.close()
+        self.table_file.exportXlsx(self.table_file_name)
+
+
+    def set_table_file(self, parquet_file: str | None = None):
+        csv_file = path.splitext(self.table_file_name)[0] + '.csv'
+        keep_rows = self.manifest is not None or self.resuming
+        self.imported_xlsx = keep_rows and not path.exists(csv_file) and path.exists(self.table_file_name)
+        self.table_file = ResultTable(csv_file, keep_rows)
+        if self.imported_xlsx:
+            self.table_file.importXlsx(self.table_file_name)
+        self.table_file.parquetFile = parquet_file
+
+
+    def has_untracked_rows(self):
+        return any(len(row) >= 3 and self.manifest.previous(row[2]) is None
+                   for index, row in zip(range(self.table_file.previousRows), self.table_file.rows()))
+
+
+    def drop_superseded_rows(self):
+        superseded = self.rerun_files if self.untracked_rows else self.reprocessed_files
+        if len(superseded) == self.dropped_count:
+            return
+        self.dropped_count = len(superseded)
+        self.table_file.removeFiles(superseded)
+
+
+    def pending_files(self):
+        for file in self.files:
+            if self.resuming and self.checkpoint.isCompleted(file):
+                self.skipped_files += 1
+            elif self.manifest is None:
+                yield file
+            elif self.manifest.isUnchanged(file):
+                self.skipped_files += 1
+            else:
+                if self.manifest.previous(file) is not None:
+                    self.reprocessed_files.add(file)
+                self.rerun_files.add(file)
+                yield file
+
+
+    def extraction_jobs(self):
+        for file in scanAhead(self.pending_files()):
+            yield file, None
+
+
+    def extracted_files(self):
+        if self.workers == 1:
+            yield from map(extract_file_data, self.extraction_jobs())
+            return
+        with Pool(self.workers, init_extraction, self.extraction_settings) as pool:
+            yield from pool.imap(extract_file_data, self.extraction_jobs(), 4)
 
 
-    def set_table_file(self):
-        self.table_file = pd.DataFrame({'Número da nota': [], 'Cidade': []})
-    
-    
     def get_file_data(self):
-        for index, file in enumerate(self.files):
-            self.logProgress(index, len(self.files))
-            methods = ExtractMethodList().getList()
-            for methodNumber, method in enumerate(methods):
-                debug = methodNumber == len(methods) - 1
-                try:
-                    [nf_number, nf_city, file] = method().execute(file)
-                    self.organize_files(nf_number, nf_city, file)
-                    break
-                except ErrorOnPDFHandle as err:
-                    if debug: 
-                        print(err.message)
-                        self.errorLogFile.write(err.message + '\n\n\n')
-                        exit(1)
-                except IncorrectMimeType as err:
-                    if debug: 
-                        print(err.message)
-                        self.errorLogFile.write(err.message + '\n\n\n')
-                    continue
-
-
-    def organize_files(self, nf_number: str, nf_city: str, file):
+        for index, result in enumerate(self.extracted_files()):
+            self.handle_extracted(index, result)
+        self.logFinalProgress()
+        self.exit_if_no_files(self.folder, self.skipped_files)
+
+
+    def run_async_pipeline(self, read_concurrency: int, place_concurrency: int, queue_size: int):
+        with ProcessPoolExecutor(self.workers, initializer=init_extraction, initargs=self.extraction_settings) as executor:
+            AsyncPipeline(self, executor, extract_file_data, self.workers,
+                          read_concurrency, place_concurrency, queue_size).run()
+        self.logFinalProgress()
+        self.exit_if_no_files(self.folder, self.skipped_files)
+
+
+    def handle_extracted(self, index, result, placed: tuple[str, dict | None] | None = None):
+        file, data, err, report = result
+        self.processed_count = index + 1
+        self.logProgress(index)
+        self.layout_stats.record(report['method'], report['misses'], report['fingerprint'])
+        self.metrics.merge(report['metrics'])
+        if err is None:
+            [nf_number, nf_city, file] = data
+            with self.metrics.stage('organize_files', file):
+                if placed is None:
+                    placed_city = self.organize_files(nf_number, nf_city, file, report['hash'])
+                else:
+                    placed_city, manifest_entry = placed
+                    self.record_placed(nf_number, placed_city, file, manifest_entry)
+            if self.result_store is not None:
+                self.result_store.add(nf_number, placed_city, file, report['hash'], report['method'])
+        else:
+            self.handle_error(file, err)
+        self.complete_file(file)
+
+
+    def handle_error(self, file, err):
+        print(err.message)
+        self.errorLogFile.write(err.message + '\n\n\n')
+        if not isinstance(err, ErrorOnPDFHandle):
+            return
+        if self.quarantine is None:
+            if self.manifest is not None:
+                self.drop_superseded_rows()
+            self.table_file.close()
+            if self.result_store is not None:
+                self.result_store.close()
+            if self.manifest is not None:
+                self.manifest.save()
+            exit(1)
+        try:
+            destino = self.quarantine.isolate(file, err)
+        except OSError as move_err:
+            message = f'Erro ao mover {file} para a quarentena: {move_err}'
+            print(message)
+            self.errorLogFile.write(message + '\n\n\n')
+            return
+        print(f'{file} movido para {destino}')
+
+
+    def complete_file(self, file):
+        if self.checkpoint is None:
+            return
+        if self.resuming and file in self.unconfirmed_files:
+            self.redone_files.add(file)
+        if self.checkpoint.complete(file):
+            self.save_checkpoint()
+
+
+    def save_checkpoint(self):
+        self.table_file.flush()
+        if self.result_store is not None:
+            self.result_store.flush()
+        if self.manifest is not None:
+            self.drop_superseded_rows()
+            self.manifest.save()
+        self.checkpoint.save(self.table_file.rowCount)
+
+
+    def organize_files(self, nf_number: str, nf_city: str, file, hash: str | None = None):
+            nf_city, manifest_entry = self.place_file(nf_number, nf_city, file, hash)
+            self.record_placed(nf_number, nf_city, file, manifest_entry)
+            return nf_city
+
+
+    def record_placed(self, nf_number: str, nf_city: str, file, manifest_entry: dict | None):
+            self.table_file.append(nf_number, nf_city, file)
+            if self.manifest is None:
+                return
+            if manifest_entry is None:
+                self.manifest.forget(file)
+            else:
+                self.manifest.commit(file, manifest_entry)
+
+
+    def destination(self, nf_number: str, nf_city: str):
             if nf_number == 'cancelada' and nf_city == 'cancelada':
                 nf_city = 'Notas_Canceladas'
             pasta_completa_para_salvar = f'{self.nome_pasta_onde_salvar}{path.sep}{nf_city}'
-            new_row = pd.DataFrame({'Número da nota': [nf_number], 'Cidade': [nf_city]}, columns=self.table_file.columns)
-            self.table_file = pd.concat([self.table_file, new_row], ignore_index=True)
-            try:
-                mkdir(pasta_completa_para_salvar)
-            except FileExistsError:
-                pass
+            return nf_city, f'{pasta_completa_para_salvar}{path.sep}{nf_number}.pdf'
+
+
+    def place_file(self, nf_number: str, nf_city: str, file, hash: str | None = None):
+            nf_city, destino = self.destination(nf_number, nf_city)
+            manifest_entry = None
+            if self.manifest is not None:
+                manifest_entry = self.manifest.entryFor(file, destino, nf_number, nf_city, hash)
 
             try:
-                if currentOS() == 'Windows':
-                    system(f'copy "{file}" "{pasta_completa_para_salvar}{path.sep}{nf_number}.pdf" 1>NULL')
-                else:
-                    system(f'cp "{file}" "{pasta_completa_para_salvar}{path.sep}{nf_number}.pdf"')
-            except FileNotFoundError:
-                print('Erro, arquivo não encontrado')
+                self.placer.place(file, destino)
+            except OSError as err:
+                message = f'Erro ao gravar {file} em {destino}: {err}'
+                print(message)
+                self.errorLogFile.write(message + '\n\n\n')
+                manifest_entry = None
+            return nf_city, manifest_entry
     
 
-    def list_folder_files(self, dir, debug=False):
-        if debug:
-            print('Listando diretórios...')
-        try:
-            for item in ls(dir):
-                d = path.join(dir, item)
-                if path.isdir(d):
-                    if debug:
-                        print('Pasta encontrada')
-                    self.list_folder_files(d, debug)
-                else:
-                    if debug:
-                        print('Arquivo Encontrado')
-                    self.files.append(str(d))
-            else:
-                if len(self.files) == 0:
-                    print('Não encontrados arquivos')
-                    exit(3)
-                    
-        except PermissionError:
-            if debug:
-                print('Permissão Negada à Pasta')
-        except Exception as e:
-            if debug:
-                print('Erro não tratado list_folder_files: '+str(e))
-            
-
-PDFManager('arquivos')
\ No newline at end of file
+    def list_folder_files(self, dir):
+        self.scanner = FolderScanner(dir, self.file_filter, self.log_scan_error, self.log_rejected_file)
+        return self.scanner
+
+
+    def exit_if_no_files(self, dir, skipped):
+        if self.scanner.found == 0 and skipped == 0:
+            print(f'Não encontrados arquivos em {dir}')
+            exit(3)
+
+
+    def log_scan_error(self, file: str, err: OSError):
+        message = f'Erro ao listar {file}: {err}'
+        print(message)
+        self.errorLogFile.write(message + '\n\n\n')
+
+
+    def log_rejected_file(self, file: str):
+        self.errorLogFile.write(f'Arquivo ignorado, não é PDF: {file}\n\n\n')
+
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Separa notas fiscais em PDF por cidade')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processos usados na extração dos PDFs (padrão: 1)')
+    parser.add_argument('--cache-dir', default='.cache_extracao',
+                        help='pasta do cache de extração (padrão: .cache_extracao)')
+    parser.add_argument('--cache-max-mb', type=int, default=1024,
+                        help='tamanho máximo do cache de extração em MB (padrão: 1024)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='não consulta nem grava o cache de extração')
+    parser.add_argument('--rebuild-cache', action='store_true',
+                        help='apaga o cache de extração antes de processar')
+    parser.add_argument('--incremental', action='store_true',
+                        help='processa apenas arquivos novos ou alterados desde a última execução')
+    parser.add_argument('--ocr-dpi', type=int, default=200,
+                        help='resolução usada ao rasterizar páginas para OCR (padrão: 200)')
+    parser.add_argument('--ocr-grayscale', action='store_true',
+                        help='rasteriza as páginas em tons de cinza para OCR')
+    parser.add_argument('--ocr-threads', type=int, default=1,
+                        help='threads do pdftoppm ao rasterizar páginas para OCR (padrão: 1)')
+    parser.add_argument('--ocr-temp-dir', action='store_true',
+                        help='grava as imagens rasterizadas em pasta temporária em vez de mantê-las em memória')
+    parser.add_argument('--ocr-engine', choices=OCR_ENGINES, default='auto',
+                        help='tesserocr mantém o modelo do tesseract carregado em cada processo; pytesseract executa '
+                             'o binário a cada página; auto usa tesserocr quando instalado (padrão: auto)')
+    parser.add_argument('--ocr-header-fraction', type=float, default=1.0,
+                        help='fração superior da página enviada ao OCR, onde ficam número e município (padrão: 1, página inteira)')
+    parser.add_argument('--parquet', metavar='ARQUIVO',
+                        help='grava também as linhas desta execução em Parquet (requer pyarrow)')
+    parser.add_argument('--placement', choices=FilePlacer.strategies, default='copy',
+                        help='como gravar as notas em final/: cópia, hardlink, reflink ou mover (padrão: copy)')
+    parser.add_argument('--split', action='store_true',
+                        help='divide os PDFs de arquivos_pre em uma página por arquivo antes de processar')
+    parser.add_argument('--trace', metavar='ARQUIVO',
+                        help='grava o tempo de cada etapa por arquivo neste arquivo JSON lines')
+    parser.add_argument('--progress-interval', type=float, default=2.0,
+                        help='intervalo mínimo em segundos entre mensagens de progresso (padrão: 2)')
+    parser.add_argument('--text-mode', choices=TEXT_MODES, default='grouped',
+                        help='extração de texto: grouped (agrupamento completo, padrão), fast (sem agrupamento de '
+                             'layout) ou auto (fast, conferido com grouped nas primeiras notas de cada layout e '
+                             'sempre que o número extraído não for numérico)')
+    parser.add_argument('--file-filter', choices=FolderScanner.filters, default='extension',
+                        help='como reconhecer PDFs ao listar as pastas: pela extensão, pelos bytes iniciais '
+                             '(%%PDF-) ou sem filtro (padrão: extension)')
+    parser.add_argument('--pipeline', choices=('sequential', 'async'), default='sequential',
+                        help='sequential: lê, extrai e grava um arquivo por vez; async: sobrepõe leitura, '
+                             'extração e gravação em etapas com filas limitadas (padrão: sequential)')
+    parser.add_argument('--read-concurrency', type=int, default=4,
+                        help='leituras simultâneas de arquivos no modo async (padrão: 4)')
+    parser.add_argument('--place-concurrency', type=int, default=4,
+                        help='gravações simultâneas em final/ no modo async (padrão: 4)')
+    parser.add_argument('--queue-size', type=int, default=64,
+                        help='arquivos em andamento entre as etapas do modo async, limita o uso de memória (padrão: 64)')
+    parser.add_argument('--batch', action='store_true',
+                        help='não interrompe a execução quando um PDF falha: move-o para quarentena/, registra o erro '
+                             'em quarentena/erros.jsonl e grava checkpoints periódicos')
+    parser.add_argument('--resume', action='store_true',
+                        help='retoma a última execução em modo --batch a partir do último checkpoint')
+    parser.add_argument('--checkpoint-every', type=int, default=100,
+                        help='arquivos concluídos entre checkpoints no modo --batch (padrão: 100)')
+    parser.add_argument('--database', default='notas.sqlite3', metavar='ARQUIVO',
+                        help='banco SQLite indexado com as notas processadas, consultado por consultaNotas.py (padrão: notas.sqlite3)')
+    parser.add_argument('--no-database', action='store_true',
+                        help='não grava as notas no banco SQLite')
+    args = parser.parse_args()
+    PDFManager('arquivos', split_files=args.split, workers=args.workers,
+               cache_folder=None if args.no_cache else args.cache_dir,
+               cache_max_mb=args.cache_max_mb, rebuild_cache=args.rebuild_cache,
+               incremental=args.incremental,
+               ocr_settings=OCRSettings(args.ocr_dpi, args.ocr_grayscale, args.ocr_threads, args.ocr_temp_dir,
+                                        args.ocr_engine, args.ocr_header_fraction),
+               parquet_file=args.parquet, placement=args.placement,
+               trace_file=args.trace, progress_interval=args.progress_interval,
+               text_mode=args.text_mode, file_filter=args.file_filter,
+               pipeline=args.pipeline, read_concurrency=args.read_concurrency,
+               place_concurrency=args.place_concurrency, queue_size=args.queue_size,
+               batch=args.batch, resume=args.resume, checkpoint_every=args.checkpoint_every,
+               database_file=None if args.no_database else args.database)
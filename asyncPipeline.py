@@ -0,0 +1,113 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Callable
+
+DONE = object()
+
+
+def readFile(file: str) -> bytes | None:
+    try:
+        with open(file, 'rb') as file_binary:
+            return file_binary.read()
+    except OSError:
+        return None
+
+
+class OrderedRelease:
+    def __init__(self, queue: asyncio.Queue) -> None:
+        self.queue = queue
+        self.pending: dict[int, tuple] = {}
+        self.next = 0
+        self.lock = asyncio.Lock()
+
+    async def put(self, index: int, item: tuple) -> None:
+        self.pending[index] = item
+        async with self.lock:
+            while self.next in self.pending:
+                await self.queue.put(self.pending.pop(self.next))
+                self.next += 1
+
+
+class AsyncPipeline:
+    def __init__(self, manager, executor: Executor, extract: Callable, extractConcurrency: int = 1,
+                 readConcurrency: int = 4, placeConcurrency: int = 4, queueSize: int = 64) -> None:
+        self.manager = manager
+        self.executor = executor
+        self.extract = extract
+        self.extractConcurrency = max(1, extractConcurrency)
+        self.readConcurrency = max(1, readConcurrency)
+        self.placeConcurrency = max(1, placeConcurrency)
+        self.queueSize = max(1, queueSize)
+
+    def run(self) -> None:
+        asyncio.run(self.main())
+
+    async def main(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.inFlight = asyncio.Semaphore(self.queueSize)
+        self.destinationLocks: dict[str, list] = {}
+        readQueue = asyncio.Queue(self.queueSize)
+        extractQueue = asyncio.Queue(self.queueSize)
+        placeQueue = asyncio.Queue(self.queueSize)
+        recordQueue = asyncio.Queue(self.queueSize)
+        self.placeOrder = OrderedRelease(placeQueue)
+        self.recordOrder = OrderedRelease(recordQueue)
+        await asyncio.gather(
+            self.scan(readQueue),
+            self.stage(readQueue, self.readConcurrency, lambda item: self.read(item, extractQueue), extractQueue, self.extractConcurrency),
+            self.stage(extractQueue, self.extractConcurrency, self.extractItem, placeQueue, self.placeConcurrency),
+            self.stage(placeQueue, self.placeConcurrency, self.place, recordQueue, 1),
+            self.stage(recordQueue, 1, self.record),
+        )
+
+    async def stage(self, queue: asyncio.Queue, concurrency: int, work: Callable,
+                    nextQueue: asyncio.Queue | None = None, nextConcurrency: int = 0) -> None:
+        async def worker():
+            while (item := await queue.get()) is not DONE:
+                await work(item)
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        for _ in range(nextConcurrency):
+            await nextQueue.put(DONE)
+
+    async def scan(self, readQueue: asyncio.Queue) -> None:
+        files = iter(self.manager.pending_files())
+        index = 0
+        while (file := await asyncio.to_thread(next, files, None)) is not None:
+            await self.inFlight.acquire()
+            await readQueue.put((index, file))
+            index += 1
+        for _ in range(self.readConcurrency):
+            await readQueue.put(DONE)
+
+    async def read(self, item: tuple[int, str], extractQueue: asyncio.Queue) -> None:
+        index, file = item
+        data = await asyncio.to_thread(readFile, file)
+        await extractQueue.put((index, file, data))
+
+    async def extractItem(self, item: tuple) -> None:
+        index, file, data = item
+        result = await self.loop.run_in_executor(self.executor, self.extract, (file, data))
+        await self.placeOrder.put(index, (index, result))
+
+    async def place(self, item: tuple) -> None:
+        index, result = item
+        file, data, err, report = result
+        placed = None
+        if err is None:
+            nf_number, nf_city, file = data
+            destination = self.manager.destination(nf_number, nf_city)[1]
+            lock = self.destinationLocks.setdefault(destination, [asyncio.Lock(), 0])
+            lock[1] += 1
+            try:
+                async with lock[0]:
+                    placed = await asyncio.to_thread(self.manager.place_file, nf_number, nf_city, file, report['hash'])
+            finally:
+                lock[1] -= 1
+                if lock[1] == 0:
+                    del self.destinationLocks[destination]
+        await self.recordOrder.put(index, (index, result, placed))
+
+    async def record(self, item: tuple) -> None:
+        index, result, placed = item
+        self.manager.handle_extracted(index, result, placed)
+        self.inFlight.release()
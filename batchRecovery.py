@@ -0,0 +1,76 @@
+import json
+import shutil
+from os import makedirs, path, remove, replace
+
+from pdfExceptions import ErrorOnPDFHandle
+
+
+class Quarantine:
+    def __init__(self, folder: str = 'quarentena', sourceFolder: str = 'arquivos') -> None:
+        self.folder = folder
+        self.sourceFolder = sourceFolder
+        self.errorsFile = path.join(folder, 'erros.jsonl')
+        self.isolated = 0
+
+    def isolate(self, file: str, err: ErrorOnPDFHandle) -> str:
+        destination = self.freeDestination(path.join(self.folder, path.relpath(file, self.sourceFolder)))
+        makedirs(path.dirname(destination), exist_ok=True)
+        shutil.move(file, destination)
+        with open(self.errorsFile, 'a', encoding='utf8') as errors:
+            errors.write(json.dumps({'arquivo': file, 'quarentena': destination, 'detalhes': err.items,
+                                     'conteudo': err.pdfText}, ensure_ascii=False) + '\n')
+        self.isolated += 1
+        return destination
+
+    @staticmethod
+    def freeDestination(destination: str) -> str:
+        name, extension = path.splitext(destination)
+        copy = 1
+        while path.lexists(destination):
+            destination = f'{name}_{copy}{extension}'
+            copy += 1
+        return destination
+
+
+class RunCheckpoint:
+    def __init__(self, folder: str, checkpointFile: str = 'checkpoint_execucao.json', every: int = 100) -> None:
+        self.folder = folder
+        self.checkpointFile = checkpointFile
+        self.every = max(1, every)
+        self.lastFile: str | None = None
+        self.rows: int | None = None
+        self.sinceSave = 0
+
+    def load(self) -> bool:
+        if not path.exists(self.checkpointFile):
+            return False
+        with open(self.checkpointFile, encoding='utf8') as checkpoint:
+            state = json.load(checkpoint)
+        if state['folder'] != self.folder:
+            return False
+        self.lastFile = state['last_file']
+        self.rows = state['rows']
+        return True
+
+    def walkKey(self, file: str) -> tuple[str, ...]:
+        return tuple(path.relpath(file, self.folder).split(path.sep))
+
+    def isCompleted(self, file: str) -> bool:
+        return self.lastFile is not None and self.walkKey(file) <= self.walkKey(self.lastFile)
+
+    def complete(self, file: str) -> bool:
+        self.lastFile = file
+        self.sinceSave += 1
+        return self.sinceSave >= self.every
+
+    def save(self, rows: int) -> None:
+        self.rows = rows
+        self.sinceSave = 0
+        temporaryFile = self.checkpointFile + '.tmp'
+        with open(temporaryFile, 'w', encoding='utf8') as checkpoint:
+            json.dump({'folder': self.folder, 'last_file': self.lastFile, 'rows': rows}, checkpoint, ensure_ascii=False)
+        replace(temporaryFile, self.checkpointFile)
+
+    def clear(self) -> None:
+        if path.exists(self.checkpointFile):
+            remove(self.checkpointFile)
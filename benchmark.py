@@ -0,0 +1,171 @@
+import csv
+import json
+import shutil
+import sys
+import time
+from argparse import ArgumentParser
+from contextlib import contextmanager
+from os import chdir, getcwd, makedirs, path
+
+from pdfminer.converter import PDFPageAggregator
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+
+from extractMethods import getPDFText, getPDFTextAsImage, layoutMatcher
+from filePlacement import FilePlacer
+from resultTable import ResultTable
+from syntheticCorpus import generateCorpus
+
+try:
+    from resource import RUSAGE_CHILDREN, RUSAGE_SELF, getrusage
+except ImportError:
+    getrusage = None
+
+
+def peakRSSMB() -> dict[str, float] | None:
+    if getrusage is None:
+        return None
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'self': round(getrusage(RUSAGE_SELF).ru_maxrss / divisor, 1),
+        'children': round(getrusage(RUSAGE_CHILDREN).ru_maxrss / divisor, 1),
+    }
+
+
+@contextmanager
+def workingFolder(folder: str):
+    previous = getcwd()
+    chdir(folder)
+    try:
+        yield
+    finally:
+        chdir(previous)
+
+
+def parseOnly(file: str) -> None:
+    with open(file, 'rb') as file_binary:
+        doc = PDFDocument(PDFParser(file_binary))
+        rsrcmgr = PDFResourceManager()
+        device = PDFPageAggregator(rsrcmgr, laparams=None)
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for page in PDFPage.create_pages(doc):
+            interpreter.process_page(page)
+            device.get_result()
+            break
+
+
+def tableRows(csvFile: str) -> int | None:
+    if not path.exists(csvFile):
+        return None
+    with open(csvFile, encoding='utf8', newline='') as source:
+        return max(0, sum(1 for _ in csv.reader(source)) - 1)
+
+
+def timeStage(name: str, items: list, action) -> dict:
+    started = time.perf_counter()
+    for item in items:
+        action(item)
+    seconds = time.perf_counter() - started
+    return {'stage': name, 'files': len(items), 'seconds': round(seconds, 4),
+            'files_per_sec': round(len(items) / seconds, 2) if seconds > 0 else None}
+
+
+def benchmarkSize(folder: str, size: int, ocrRatio: float, workers: int, endToEnd: bool) -> dict:
+    started = time.perf_counter()
+    corpus = generateCorpus(path.join(folder, 'arquivos'), size, ocrRatio)
+    report = {'files': size, 'generate_seconds': round(time.perf_counter() - started, 4), 'stages': []}
+    textFiles = [item for item in corpus if not item['scanned']]
+    scannedFiles = [item for item in corpus if item['scanned']]
+    extracted: dict[str, list[str]] = {}
+
+    parse = timeStage('parse', textFiles, lambda item: parseOnly(item['file']))
+    text = timeStage('parse_and_layout', textFiles, lambda item: extracted.__setitem__(item['file'], getPDFText(item['file'], 1)))
+    report['stages'] += [parse, text, {'stage': 'layout', 'files': len(textFiles),
+                                       'seconds': round(text['seconds'] - parse['seconds'], 4)}]
+    fastText: dict[str, list[str]] = {}
+    report['stages'].append(timeStage('parse_and_fast_text', textFiles, lambda item: fastText.__setitem__(item['file'], getPDFText(item['file'], 1, 'fast'))))
+    report['fast_text_identical'] = round(sum(1 for item in textFiles if fastText[item['file']] == extracted[item['file']]) / max(1, len(textFiles)), 4)
+    report['stages'].append(timeStage('ocr', scannedFiles, lambda item: extracted.__setitem__(item['file'], [getPDFTextAsImage(item['file'], 0)])))
+
+    matches = {}
+    report['stages'].append(timeStage('match', corpus, lambda item: matches.__setitem__(item['file'], layoutMatcher.match(extracted[item['file']])[0])))
+    expected = lambda items: round(sum(1 for item in items if matches[item['file']] is not None and matches[item['file']].name == item['layout']) / max(1, len(items)), 4)
+    report['match_rate'] = {
+        'pdf': round(sum(1 for item in corpus if matches[item['file']] is not None) / size, 4),
+        'expected_layout': expected(textFiles),
+        'expected_layout_ocr': expected(scannedFiles) if scannedFiles else None,
+    }
+    report['failures'] = []
+    if report['match_rate']['expected_layout'] < 1.0:
+        report['failures'].append(f'expected_layout = {report["match_rate"]["expected_layout"]}')
+    report['stages'].append(timeStage('match_reference_text', corpus, lambda item: layoutMatcher.match([item['text']])))
+
+    placer = FilePlacer('copy')
+    report['stages'].append(timeStage('organize', corpus, lambda item: placer.place(item['file'], path.join(folder, 'final', item['layout'], path.basename(item['file'])))))
+
+    table = ResultTable(path.join(folder, 'tabela.csv'))
+    started = time.perf_counter()
+    for index, item in enumerate(corpus):
+        table.append(str(index), item['layout'], item['file'])
+    table.close()
+    table.exportXlsx(path.join(folder, 'tabela.xlsx'))
+    seconds = time.perf_counter() - started
+    report['stages'].append({'stage': 'table_write', 'files': size, 'seconds': round(seconds, 4),
+                             'files_per_sec': round(size / seconds, 2) if seconds > 0 else None})
+
+    if endToEnd:
+        from app import PDFManager
+        with workingFolder(folder):
+            makedirs('final', exist_ok=True)
+            started = time.perf_counter()
+            try:
+                PDFManager('arquivos', workers=workers, cache_folder=None)
+                status = 'ok'
+            except SystemExit as exit:
+                status = f'exit {exit.code}'
+            seconds = time.perf_counter() - started
+            rows = tableRows('Relação de Notas x Cidades.csv') if status == 'ok' else None
+        completed = status == 'ok' and rows == size
+        if not completed:
+            report['failures'].append(f'end_to_end: status {status}, {rows} linhas na tabela para {size} arquivos')
+        report['stages'].append({'stage': 'end_to_end', 'files': size, 'workers': workers, 'status': status, 'rows': rows,
+                                 'seconds': round(seconds, 4),
+                                 'files_per_sec': round(size / seconds, 2) if completed and seconds > 0 else None})
+
+    report['peak_rss_mb'] = peakRSSMB()
+    return report
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Mede o desempenho da extração em um corpus sintético de NFS-e')
+    parser.add_argument('--sizes', default='100,1000,10000',
+                        help='quantidades de arquivos a gerar, separadas por vírgula (padrão: 100,1000,10000)')
+    parser.add_argument('--ocr-ratio', type=float, default=0.02,
+                        help='fração de páginas só com imagem, que exigem OCR (padrão: 0.02)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processos usados na execução completa do PDFManager (padrão: 1)')
+    parser.add_argument('--no-end-to-end', action='store_true',
+                        help='não executa o PDFManager completo sobre o corpus')
+    parser.add_argument('--workdir', default='benchmark_corpus',
+                        help='pasta temporária do corpus sintético (padrão: benchmark_corpus)')
+    parser.add_argument('--output', help='grava o relatório JSON neste arquivo em vez de imprimi-lo')
+    args = parser.parse_args()
+
+    reports = []
+    for size in (int(size) for size in args.sizes.split(',')):
+        folder = path.abspath(path.join(args.workdir, str(size)))
+        shutil.rmtree(folder, ignore_errors=True)
+        reports.append(benchmarkSize(folder, size, args.ocr_ratio, args.workers, not args.no_end_to_end))
+        shutil.rmtree(folder, ignore_errors=True)
+    output = json.dumps({'runs': reports}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as report_file:
+            report_file.write(output)
+    else:
+        print(output)
+    failures = [f'{run["files"]} arquivos: {failure}' for run in reports for failure in run['failures']]
+    if failures:
+        print('Benchmark inválido:\n  ' + '\n  '.join(failures), file=sys.stderr)
+        exit(1)
@@ -0,0 +1,50 @@
+import re
+from argparse import ArgumentParser
+from os import makedirs, path
+
+import openpyxl
+
+from resultStore import ResultStore
+
+
+def exportCitySheets(store: ResultStore, folder: str, city: str | None = None,
+                     numberFrom: int | None = None, numberTo: int | None = None) -> int:
+    makedirs(folder, exist_ok=True)
+    cities = [city] if city is not None else [name for name, _ in store.cities()]
+    for name in cities:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(['Número da nota', 'Cidade', 'Arquivo'])
+        for nf_number, nf_city, source_path, *_ in store.query(name, numberFrom, numberTo):
+            sheet.append([nf_number, nf_city, source_path])
+        workbook.save(path.join(folder, re.sub(r'[\\/:*?"<>|]', '_', name) + '.xlsx'))
+    return len(cities)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Consulta as notas gravadas pelo PDFManager no banco SQLite')
+    parser.add_argument('--database', default='notas.sqlite3',
+                        help='banco de notas gerado pelo app.py (padrão: notas.sqlite3)')
+    parser.add_argument('--cidade', help='filtra pelo nome exato da cidade')
+    parser.add_argument('--de', type=int, help='menor número de nota')
+    parser.add_argument('--ate', type=int, help='maior número de nota')
+    parser.add_argument('--limite', type=int, help='quantidade máxima de notas listadas')
+    parser.add_argument('--cidades', action='store_true',
+                        help='lista as cidades com a quantidade de notas de cada uma')
+    parser.add_argument('--planilhas', metavar='PASTA',
+                        help='gera uma planilha por cidade nesta pasta em vez de listar as notas')
+    args = parser.parse_args()
+    if not path.exists(args.database):
+        print(f'Banco de notas não encontrado: {args.database}')
+        exit(3)
+    store = ResultStore(args.database)
+    if args.cidades:
+        for city, total in store.cities():
+            print(f'{city}\t{total}')
+    elif args.planilhas:
+        total = exportCitySheets(store, args.planilhas, args.cidade, args.de, args.ate)
+        print(f'{total} planilhas geradas em {args.planilhas}')
+    else:
+        for nf_number, city, source_path, hash, extractor, timestamp in store.query(args.cidade, args.de, args.ate, args.limite):
+            print(f'{nf_number}\t{city}\t{source_path}\t{extractor or ""}')
+    store.close()
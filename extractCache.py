@@ -0,0 +1,109 @@
+import hashlib
+import json
+import sqlite3
+import time
+from os import makedirs, path
+
+
+def fileHash(file: str) -> str:
+    digest = hashlib.sha256()
+    with open(file, 'rb') as file_binary:
+        for chunk in iter(lambda: file_binary.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def dataHash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+SCHEMA_VERSION = 2
+
+
+class ExtractionCache:
+    def __init__(self, folder: str = '.cache_extracao', maxSizeMB: int = 1024) -> None:
+        makedirs(folder, exist_ok=True)
+        self.maxSize = maxSizeMB * 1024 * 1024
+        self.connection = sqlite3.connect(path.join(folder, 'extracao.sqlite3'), timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self.connection.executescript(f'''
+                DROP TABLE IF EXISTS page_text;
+                DROP TABLE IF EXISTS results;
+                PRAGMA user_version = {SCHEMA_VERSION};
+            ''')
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS page_text (
+                hash TEXT NOT NULL,
+                pages INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (hash, pages, mode)
+            );
+            CREATE INDEX IF NOT EXISTS page_text_accessed ON page_text (accessed);
+            CREATE TABLE IF NOT EXISTS results (
+                hash TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                mode TEXT NOT NULL,
+                method TEXT NOT NULL,
+                nf_number TEXT NOT NULL,
+                nf_city TEXT NOT NULL,
+                accessed REAL NOT NULL,
+                PRIMARY KEY (hash, version, mode)
+            );
+        ''')
+
+    def getPagesText(self, hash: str, pages: int, mode: str) -> list[str] | None:
+        key = (hash, pages, mode)
+        row = self.connection.execute('SELECT text FROM page_text WHERE hash = ? AND pages = ? AND mode = ?', key).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute('UPDATE page_text SET accessed = ? WHERE hash = ? AND pages = ? AND mode = ?', (time.time(),) + key)
+        return json.loads(row[0])
+
+    def putPagesText(self, hash: str, pages: int, mode: str, pagesText: list[str]) -> None:
+        text = json.dumps(pagesText, ensure_ascii=False)
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO page_text VALUES (?, ?, ?, ?, ?, ?)',
+                                    (hash, pages, mode, text, len(text.encode('utf8')), time.time()))
+
+    def getResult(self, hash: str, version: int, mode: str) -> tuple[str, str, str] | None:
+        key = (hash, version, mode)
+        row = self.connection.execute('SELECT method, nf_number, nf_city FROM results WHERE hash = ? AND version = ? AND mode = ?', key).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute('UPDATE results SET accessed = ? WHERE hash = ? AND version = ? AND mode = ?', (time.time(),) + key)
+        return row
+
+    def putResult(self, hash: str, version: int, mode: str, method: str, nf_number: str, nf_city: str) -> None:
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                    (hash, version, mode, method, nf_number, nf_city, time.time()))
+
+    def clear(self) -> None:
+        with self.connection:
+            self.connection.execute('DELETE FROM page_text')
+            self.connection.execute('DELETE FROM results')
+        self.connection.execute('VACUUM')
+
+    def evict(self) -> None:
+        total = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM page_text').fetchone()[0]
+        if total <= self.maxSize:
+            return
+        excess = total - self.maxSize
+        removed = []
+        for hash, pages, mode, size in self.connection.execute('SELECT hash, pages, mode, size FROM page_text ORDER BY accessed'):
+            removed.append((hash, pages, mode))
+            excess -= size
+            if excess <= 0:
+                break
+        with self.connection:
+            self.connection.executemany('DELETE FROM page_text WHERE hash = ? AND pages = ? AND mode = ?', removed)
+            self.connection.execute('DELETE FROM results WHERE hash NOT IN (SELECT hash FROM page_text)')
+
+    def close(self) -> None:
+        self.connection.close()
@@ -1,335 +1,422 @@
 import mimetypes
 import re
+from contextlib import nullcontext
+from io import BytesIO
+from tempfile import TemporaryDirectory
+from typing import Iterator
 
 from pdfminer.converter import PDFPageAggregator
-from pdfminer.layout import LAParams
+from pdfminer.layout import LAParams, LTTextBox
 from pdfminer.pdfdevice import PDFDevice
 from pdfminer.pdfdocument import PDFDocument
 from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
 from pdfminer.pdfpage import PDFPage, PDFTextExtractionNotAllowed
 from pdfminer.pdfparser import PDFParser
-import pytesseract
-from pdf2image import convert_from_path
+from pdf2image import convert_from_bytes, convert_from_path
 
+from extractCache import ExtractionCache, dataHash, fileHash
+from folderScanner import hasPDFHeader
+from layoutStats import LayoutStats
+from ocrEngine import OCREngine, resolveEngine
 from pdfExceptions import ErrorOnPDFHandle, IncorrectMimeType
-
-
-class extractMethodInterface:
-    def __init__(self) -> None:
-        pass
-
-    def execute(self, file: str) -> list[int]:
-        pass
-
-    @staticmethod
-    def isValidMimeTypeOrError(file: str,  expectedMimeType: str = '*'):
-        if expectedMimeType == '*':
-            return True
-        guessedMimeType = mimetypes.guess_type(file)[0]
-        if guessedMimeType != None and expectedMimeType == guessedMimeType:
-            return True
-        raise IncorrectMimeType(expectedMimeType, guessedMimeType)
-
-
-def getPDFText(file: str, numberOfPages: str = 1) -> list[str]:
-    pagesText: list[str] = []
-    file_binary = open(file, 'rb')
-    parser = PDFParser(file_binary)
-    doc = PDFDocument(parser)
-    laparams = LAParams()
-    if not doc.is_extractable:
-        print('PDFTextExtractionNotAllowed')
-    rsrcmgr = PDFResourceManager()
-    device = PDFPageAggregator(rsrcmgr, laparams=laparams)
-    interpreter = PDFPageInterpreter(rsrcmgr, device)
-    for pageNumber, page in enumerate(PDFPage.create_pages(doc)):
-        if pageNumber >= numberOfPages: break
-        interpreter.process_page(page)
-        layout = device.get_result()
-        layout.analyze(laparams)
-        pdf_text: str = ''
-        try:
-            pdf_text = layout.groups[0].get_text()
-        except TypeError as e:
-            pdf_text = getPDFTextAsImage(file)
-        pagesText.append(pdf_text)
+from runMetrics import metrics
+
+EXTRACTOR_VERSION = 4
+
+
+def isValidMimeTypeOrError(file: str,  expectedMimeType: str = '*'):
+    if expectedMimeType == '*':
+        return True
+    guessedMimeType = mimetypes.guess_type(file)[0]
+    if guessedMimeType != None and expectedMimeType == guessedMimeType:
+        return True
+    raise IncorrectMimeType(expectedMimeType, guessedMimeType)
+
+
+TEXT_MODES = ('auto', 'fast', 'grouped')
+
+
+def layoutText(layout, mode: str) -> str | None:
+    try:
+        if mode == 'fast':
+            return ''.join(obj.get_text() for obj in layout if isinstance(obj, LTTextBox)) or None
+        return layout.groups[0].get_text()
+    except TypeError:
+        return None
+
+
+def iterPDFLayoutText(file: str, numberOfPages: int = 1, mode: str = 'grouped',
+                      data: bytes | None = None) -> Iterator[str | None]:
+    laparams = LAParams(boxes_flow=None) if mode == 'fast' else LAParams()
+    with BytesIO(data) if data is not None else open(file, 'rb') as file_binary:
+        doc = PDFDocument(PDFParser(file_binary))
+        if not doc.is_extractable:
+            print('PDFTextExtractionNotAllowed')
+        rsrcmgr = PDFResourceManager(caching=True)
+        device = PDFPageAggregator(rsrcmgr, laparams=laparams)
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        for pageNumber, page in enumerate(PDFPage.create_pages(doc)):
+            if pageNumber >= numberOfPages: break
+            interpreter.process_page(page)
+            pdf_text = layoutText(device.get_result(), mode)
+            device.result = None
+            yield pdf_text
+
+
+def iterPDFPagesText(file: str, numberOfPages: int = 1, mode: str = 'grouped',
+                     ocrText: dict[int, str] | None = None, data: bytes | None = None) -> Iterator[tuple[str, bool]]:
+    usedOCR = False
+    for pageNumber, pdf_text in enumerate(iterPDFLayoutText(file, numberOfPages, mode, data)):
+        if pdf_text is not None:
+            yield pdf_text, False
+        elif ocrText is not None and pageNumber in ocrText:
+            yield ocrText[pageNumber], True
+        else:
+            if not usedOCR:
+                metrics.count('arquivos_ocr')
+                usedOCR = True
+            yield getPDFTextAsImage(file, pageNumber, data), True
+
+
+def getPDFPagesText(file: str, numberOfPages: int = 1, mode: str = 'grouped',
+                    ocrText: dict[int, str] | None = None, data: bytes | None = None) -> list[tuple[str, bool]]:
+    pagesText: list[tuple[str, bool]] = []
+    missingPages: list[int] = []
+    for pageNumber, pdf_text in enumerate(iterPDFLayoutText(file, numberOfPages, mode, data)):
+        if pdf_text is not None:
+            pagesText.append((pdf_text, False))
+            continue
+        if ocrText is not None and pageNumber in ocrText:
+            pdf_text = ocrText[pageNumber]
+        else:
+            missingPages.append(pageNumber)
+        pagesText.append((pdf_text or '', True))
+    if missingPages:
+        metrics.count('arquivos_ocr')
+        for pageNumber, pdf_text in getPagesTextAsImage(file, missingPages, data).items():
+            pagesText[pageNumber] = (pdf_text, True)
     return pagesText
 
 
-def getPDFTextAsImage(file):
-    images = convert_from_path(file)
-    for image in images:
-        text = pytesseract.image_to_string(image, config='--psm 6 -l por')
-        return text
-
-class extractMethod1(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número da\n\nNFS-e\n\n'
-        self.city_locator = 'Local da Prestação\n\n'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_position = re.search(r'(\d+\n\n)?', content[city_position:-1]).end() + city_position
-                city_content = content[city_position:content.find(' -', city_position + 2)].strip()
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-
-
-class extractMethod2(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número:\n\n'
-        self.city_locator = 'Local da Prestação do Serviço:'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_position = re.search(r'\d?\d/\d\d\d\d', content[city_position:-1]).end() + city_position
-                city_content = content[city_position:content.find('\n', city_position + 2)].strip()
-                city_content = re.search(r'^(.+?[\-])', city_content).group(0)
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-
-
-class extractMethod3(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número:\n\n'
-        self.city_locator = 'Endereço Obra:'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_content = content[city_position:content.find('\n', city_position + 2)].strip()
-                city_content = re.search(r'^(.+?[\-])', city_content).group(0)
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-
-
-class extractMethod3(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número:\n\n'
-        self.city_locator = 'Natureza da Operação:'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_position = re.search(r'\d?\d/\d\d\d\d', content[city_position:-1]).end() + city_position
-                city_content = content[city_position:content.find('\n', city_position + 2)].strip()
-                city_content = re.search(r'^(.+?[\-])', city_content).group(0)
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-    
-
-class extractMethod4(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número:\n\n'
-        self.city_locator = 'Natureza da Operação:'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_position = re.search(r'\d?\d/\d\d\d\d', content[city_position:-1]).end() + city_position
-                city_content = content[city_position:content.find('\n', city_position + 2)].strip()
-                city_content = re.search(r'^(.+?[\-])', city_content).group(0)
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-    
-
-class extractMethod5(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Nº '
-        self.city_locator = 'MUNÍCIPIO\n\n'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_content = content[city_position:content.find('\n', city_position + 2)].strip()
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-    
-
-class extractMethod6(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número:\n\n'
-        self.city_locator = 'Endereço Obra:\n\n'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_content = content[city_position:content.find('-', city_position + 2)].strip()
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-    
-
-class extractMethod7(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número:\n\n'
-        self.city_locator = 'Natureza da Operação:\n\n'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_content = content[city_position:content.find('-', city_position + 2)].strip()
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-
-
-class extractMethod8(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.nf_locator = 'Número da NFS-e\n\n'
-        self.city_locator = 'Cidade - Estado\n\n'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.nf_locator) < 0 or content.find(self.city_locator) < 0:
-                    raise AttributeError
-                nf_position = content.find(self.nf_locator) + len(self.nf_locator)
-                nf_content = content[nf_position:content.find('\n', nf_position)].strip()
-                
-                city_position = (content.find(self.city_locator) + len(self.city_locator))
-                city_content = content[city_position:content.find('-', city_position + 2)].strip()
-                city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
-                city_content = city_content.strip()
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return [nf_content, city_content, file]
-
-
-class extractMethod9(extractMethodInterface):
-    def __init__(self) -> None:
-        self.expectedMimeType = 'application/pdf'
-        self.situation = 'Situação\n\n'
-
-    def execute(self, file: str) -> list[str]:
-        super().isValidMimeTypeOrError(file, self.expectedMimeType)
-        pdfContentArray = getPDFText(file, 1)
-        for content in pdfContentArray:
-            try:
-                if content.find(self.situation) < 0:
-                    raise AttributeError
-                situation_position = content.find(self.situation) + len(self.situation)
-                situation_content = content[situation_position:content.find('\n', situation_position)].strip()
-                if situation_content != 'Cancelada':
-                    raise AttributeError
-            except AttributeError:
-                raise ErrorOnPDFHandle(content, [f'file {file}'])
-
-        return ['cancelada', 'cancelada', file]
-
-
-
-class ExtractMethodList:
-    def __init__(self) -> None:
-        self.methods = [extractMethod1, extractMethod2, extractMethod3, extractMethod4, extractMethod5, extractMethod6, extractMethod7, extractMethod8, extractMethod9]
-    
-    def getList(self) -> list[extractMethodInterface]:
-        return self.methods
\ No newline at end of file
+def getPDFText(file: str, numberOfPages: int = 1, mode: str = 'grouped') -> list[str]:
+    return [pdf_text for pdf_text, _ in getPDFPagesText(file, numberOfPages, mode)]
+
+
+class OCRSettings:
+    def __init__(self, dpi: int = 200, grayscale: bool = False, threadCount: int = 1, useTempFolder: bool = False,
+                 engine: str = 'auto', headerFraction: float = 1.0) -> None:
+        self.dpi = dpi
+        self.grayscale = grayscale
+        self.threadCount = threadCount
+        self.useTempFolder = useTempFolder
+        self.engine = engine
+        self.headerFraction = min(1.0, max(0.05, headerFraction))
+
+    def cacheKey(self, mode: str) -> str:
+        key = f'{mode}:{resolveEngine(self.engine)}{self.dpi}dpi'
+        if self.grayscale:
+            key += ':cinza'
+        if self.headerFraction < 1.0:
+            key += f':topo{self.headerFraction:g}'
+        return key
+
+
+ocrSettings = OCRSettings()
+ocrEngine: OCREngine | None = None
+
+
+def textCacheKey(mode: str) -> str:
+    return ocrSettings.cacheKey(mode)
+
+
+def configureOCR(settings: OCRSettings) -> None:
+    global ocrSettings, ocrEngine
+    ocrSettings = settings
+    if ocrEngine is not None:
+        ocrEngine.close()
+    ocrEngine = None
+
+
+def getOCREngine() -> OCREngine:
+    global ocrEngine
+    if ocrEngine is None:
+        ocrEngine = OCREngine(ocrSettings.engine)
+    return ocrEngine
+
+
+def pageRanges(pageNumbers: list[int]) -> list[tuple[int, int]]:
+    ranges: list[tuple[int, int]] = []
+    for pageNumber in sorted(pageNumbers):
+        if ranges and ranges[-1][1] == pageNumber - 1:
+            ranges[-1] = (ranges[-1][0], pageNumber)
+        else:
+            ranges.append((pageNumber, pageNumber))
+    return ranges
+
+
+def getPagesTextAsImage(file: str, pageNumbers: list[int], data: bytes | None = None) -> dict[int, str]:
+    metrics.count('paginas_ocr', len(pageNumbers))
+    with metrics.stage('ocr', file), TemporaryDirectory() if ocrSettings.useTempFolder else nullcontext() as outputFolder:
+        convert = convert_from_path if data is None else convert_from_bytes
+        numberedImages = []
+        for first, last in pageRanges(pageNumbers):
+            images = convert(file if data is None else data, dpi=ocrSettings.dpi, first_page=first + 1, last_page=last + 1,
+                             grayscale=ocrSettings.grayscale, thread_count=ocrSettings.threadCount,
+                             output_folder=outputFolder)
+            numberedImages += zip(range(first, last + 1), images)
+        images = [headerRegion(image) for _, image in numberedImages]
+        texts = getOCREngine().recognize(images)
+        for image in images + [image for _, image in numberedImages]:
+            image.close()
+    return {pageNumber: text for (pageNumber, _), text in zip(numberedImages, texts)}
+
+
+def headerRegion(image):
+    if ocrSettings.headerFraction >= 1.0:
+        return image
+    return image.crop((0, 0, image.width, max(1, int(image.height * ocrSettings.headerFraction))))
+
+
+def getPDFTextAsImage(file: str, pageNumber: int = 0, data: bytes | None = None) -> str:
+    return getPagesTextAsImage(file, [pageNumber], data).get(pageNumber, '')
+
+
+class ExtractionContext:
+    def __init__(self, file: str, numberOfPages: int = 1, cache: ExtractionCache | None = None,
+                 pagesText: list[str] | None = None, textMode: str = 'grouped', data: bytes | None = None) -> None:
+        self.file = file
+        self.data = data
+        self.numberOfPages = numberOfPages
+        self.cache = cache
+        self.textMode = textMode
+        self.currentMode = 'grouped' if pagesText is not None or textMode == 'grouped' else 'fast'
+        self.method: str | None = None
+        self.fingerprint: str | None = None
+        self.misses: list[str] = []
+        self.ocrText: dict[int, str] = {}
+        self._hash: str | None = None
+        self._pagesText = pagesText
+
+    @property
+    def hash(self) -> str:
+        if self._hash is None:
+            self._hash = fileHash(self.file) if self.data is None else dataHash(self.data)
+        return self._hash
+
+    @property
+    def pagesText(self) -> list[str]:
+        if self._pagesText is None and self.cache is not None:
+            self._pagesText = self.cache.getPagesText(self.hash, self.numberOfPages, ocrSettings.cacheKey(self.currentMode))
+            if self._pagesText is None and self.currentMode == 'fast':
+                self._pagesText = self.cache.getPagesText(self.hash, self.numberOfPages, ocrSettings.cacheKey('grouped'))
+                if self._pagesText is not None:
+                    self.currentMode = 'grouped'
+        if self._pagesText is None:
+            with metrics.stage(f'getPDFText:{self.currentMode}', self.file):
+                pagesText = getPDFPagesText(self.file, self.numberOfPages, self.currentMode, self.ocrText, self.data)
+            self.ocrText.update((pageNumber, pdf_text) for pageNumber, (pdf_text, fromOCR) in enumerate(pagesText) if fromOCR)
+            self._pagesText = [pdf_text for pdf_text, _ in pagesText]
+            if self.cache is not None:
+                self.cache.putPagesText(self.hash, self.numberOfPages, ocrSettings.cacheKey(self.currentMode), self._pagesText)
+        return self._pagesText
+
+    def fallbackToGrouped(self) -> bool:
+        if self.textMode != 'auto' or self.currentMode == 'grouped':
+            return False
+        if self._pagesText is not None and len(self.ocrText) == len(self._pagesText):
+            return False
+        self.currentMode = 'grouped'
+        self._pagesText = None
+        metrics.count('fallback_agrupado')
+        return True
+
+    def cachedResult(self) -> list[str] | None:
+        if self.cache is None:
+            return None
+        cached = self.cache.getResult(self.hash, EXTRACTOR_VERSION, ocrSettings.cacheKey(self.textMode))
+        if cached is None:
+            return None
+        [self.method, nf_number, nf_city] = cached
+        metrics.count('cache_resultado')
+        return [nf_number, nf_city, self.file]
+
+    def storeResult(self, method: str, result: list[str]) -> None:
+        self.method = method
+        if self.cache is not None:
+            self.cache.putResult(self.hash, EXTRACTOR_VERSION, ocrSettings.cacheKey(self.textMode), method, result[0], result[1])
+
+
+class LayoutTemplate:
+    def __init__(self, name: str, nfLocator: str, cityLocator: str, cityTerminator: str = '\n',
+                 citySkip: str | None = None, cityPrefix: str | None = None) -> None:
+        self.name = name
+        self.nfLocator = nfLocator
+        self.cityLocator = cityLocator
+        self.cityTerminator = cityTerminator
+        self.citySkip = re.compile(citySkip) if citySkip is not None else None
+        self.cityPrefix = re.compile(cityPrefix) if cityPrefix is not None else None
+        self.locators = [nfLocator, cityLocator]
+
+    def extract(self, content: str, positions: dict[str, int]) -> list[str] | None:
+        nf_position = positions[self.nfLocator] + len(self.nfLocator)
+        nf_content = content[nf_position:content.find('\n', nf_position)].strip()
+
+        city_position = positions[self.cityLocator] + len(self.cityLocator)
+        if self.citySkip is not None:
+            skipped = self.citySkip.search(content, city_position, max(len(content) - 1, city_position))
+            if skipped is None:
+                return None
+            city_position = skipped.end()
+        city_content = content[city_position:content.find(self.cityTerminator, city_position + 2)].strip()
+        if self.cityPrefix is not None:
+            prefix = self.cityPrefix.search(city_content)
+            if prefix is None:
+                return None
+            city_content = prefix.group(0)
+        city_content = re.sub(r'[^\w ]', '', city_content).capitalize()
+        city_content = city_content.strip()
+        return [nf_content, city_content]
+
+
+class CancelledLayoutTemplate(LayoutTemplate):
+    def __init__(self, name: str, situationLocator: str, situation: str) -> None:
+        self.name = name
+        self.situationLocator = situationLocator
+        self.situation = situation
+        self.locators = [situationLocator]
+
+    def extract(self, content: str, positions: dict[str, int]) -> list[str] | None:
+        situation_position = positions[self.situationLocator] + len(self.situationLocator)
+        situation_content = content[situation_position:content.find('\n', situation_position)].strip()
+        if situation_content != self.situation:
+            return None
+        return ['cancelada', 'cancelada']
+
+
+LAYOUT_TEMPLATES: list[LayoutTemplate] = [
+    LayoutTemplate('layout1', 'Número da\n\nNFS-e\n\n', 'Local da Prestação\n\n', ' -', citySkip=r'(\d+\n\n)?'),
+    LayoutTemplate('layout2', 'Número:\n\n', 'Local da Prestação do Serviço:', '\n', citySkip=r'\d?\d/\d\d\d\d', cityPrefix=r'^(.+?[\-])'),
+    LayoutTemplate('layout3', 'Número:\n\n', 'Natureza da Operação:', '\n', citySkip=r'\d?\d/\d\d\d\d', cityPrefix=r'^(.+?[\-])'),
+    LayoutTemplate('layout5', 'Nº ', 'MUNÍCIPIO\n\n', '\n'),
+    LayoutTemplate('layout6', 'Número:\n\n', 'Endereço Obra:\n\n', '-'),
+    LayoutTemplate('layout7', 'Número:\n\n', 'Natureza da Operação:\n\n', '-'),
+    LayoutTemplate('layout8', 'Número da NFS-e\n\n', 'Cidade - Estado\n\n', '-'),
+    CancelledLayoutTemplate('layout9', 'Situação\n\n', 'Cancelada'),
+]
+
+
+class LayoutMatcher:
+    def __init__(self, templates: list[LayoutTemplate] = LAYOUT_TEMPLATES) -> None:
+        self.templates = templates
+        self.templatesByName = {template.name: template for template in templates}
+        locators = sorted({locator for template in templates for locator in template.locators}, key=len, reverse=True)
+        self.pattern = re.compile('(?=(' + '|'.join(map(re.escape, locators)) + '))')
+        self.prefixes = {locator: [other for other in locators if locator.startswith(other)] for locator in locators}
+
+    def locate(self, content: str) -> dict[str, int]:
+        positions: dict[str, int] = {}
+        for found in self.pattern.finditer(content):
+            for locator in self.prefixes[found.group(1)]:
+                positions.setdefault(locator, found.start())
+        return positions
+
+    def tryTemplate(self, template: LayoutTemplate, pagesText: list[str], pagesPositions: list[dict[str, int]]) -> list[str] | None:
+        result = None
+        for content, positions in zip(pagesText, pagesPositions):
+            if not all(locator in positions for locator in template.locators):
+                return None
+            result = template.extract(content, positions)
+            if result is None:
+                return None
+        return result
+
+    def match(self, pagesText: list[str], order: list[str] | None = None,
+              pagesPositions: list[dict[str, int]] | None = None) -> tuple[LayoutTemplate | None, list[str] | None, list[str]]:
+        if pagesPositions is None:
+            pagesPositions = [self.locate(content) for content in pagesText]
+        misses: list[str] = []
+        ordered = [self.templatesByName[name] for name in order] if order is not None else self.templates
+        for template in ordered:
+            with metrics.stage(f'tentativa:{template.name}'):
+                result = self.tryTemplate(template, pagesText, pagesPositions)
+            if result is None:
+                misses.append(template.name)
+                continue
+            for earlier in self.templates[:self.templates.index(template)]:
+                if earlier.name in misses:
+                    continue
+                earlierResult = self.tryTemplate(earlier, pagesText, pagesPositions)
+                if earlierResult is not None:
+                    return earlier, earlierResult, misses + [template.name]
+            return template, result, misses
+        return None, None, misses
+
+
+layoutMatcher = LayoutMatcher()
+layoutStats: LayoutStats | None = None
+
+
+def configureLayoutStats(stats: LayoutStats | None) -> None:
+    global layoutStats
+    layoutStats = stats
+
+
+def textFingerprint(pagesPositions: list[dict[str, int]]) -> str | None:
+    if not pagesPositions or not pagesPositions[0]:
+        return None
+    return '|'.join(sorted(locator.replace('\n', '\\n') for locator in pagesPositions[0]))
+
+
+FAST_VERIFY_SAMPLES = 5
+fastVerified: dict[str, int] = {}
+
+
+def plausibleResult(template: LayoutTemplate | None, matched: list[str] | None) -> bool:
+    if template is None:
+        return False
+    if isinstance(template, CancelledLayoutTemplate):
+        return True
+    return re.fullmatch(r'\d+([./-]\d+)*', matched[0]) is not None and matched[1] != ''
+
+
+def trustFastMatch(template: LayoutTemplate | None, matched: list[str] | None) -> bool:
+    return plausibleResult(template, matched) and fastVerified.get(template.name, 0) >= FAST_VERIFY_SAMPLES
+
+
+def recordFastCheck(fastTemplate: LayoutTemplate | None, fastMatched: list[str] | None,
+                    template: LayoutTemplate | None, matched: list[str] | None) -> None:
+    if not plausibleResult(fastTemplate, fastMatched) or fastVerified.get(fastTemplate.name, 0) < 0:
+        return
+    if fastTemplate is template and fastMatched == matched:
+        fastVerified[fastTemplate.name] = fastVerified.get(fastTemplate.name, 0) + 1
+        return
+    fastVerified[fastTemplate.name] = -1
+    metrics.count('fast_divergente')
+
+
+def extractFileData(context: ExtractionContext) -> list[str]:
+    try:
+        isValidMimeTypeOrError(context.file, 'application/pdf')
+    except IncorrectMimeType:
+        if not (b'%PDF-' in context.data[:1024] if context.data is not None else hasPDFHeader(context.file)):
+            raise
+    cached = context.cachedResult()
+    if cached is not None:
+        return cached
+    pagesPositions = [layoutMatcher.locate(content) for content in context.pagesText]
+    context.fingerprint = textFingerprint(pagesPositions)
+    order = None
+    if layoutStats is not None:
+        order = layoutStats.order(list(layoutMatcher.templatesByName), context.fingerprint)
+    [template, matched, context.misses] = layoutMatcher.match(context.pagesText, order, pagesPositions)
+    if context.currentMode == 'fast' and not trustFastMatch(template, matched) and context.fallbackToGrouped():
+        [fastTemplate, fastMatched] = [template, matched]
+        [template, matched, misses] = layoutMatcher.match(context.pagesText, order)
+        context.misses += misses
+        recordFastCheck(fastTemplate, fastMatched, template, matched)
+    if template is None:
+        raise ErrorOnPDFHandle(context.pagesText[0] if context.pagesText else '', [f'file {context.file}'])
+    [nf_number, nf_city] = matched
+    result = [nf_number, nf_city, context.file]
+    context.storeResult(template.name, result)
+    return result
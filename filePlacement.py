@@ -0,0 +1,110 @@
+import errno
+import os
+import shutil
+from os import makedirs, path, remove, replace
+
+try:
+    from fcntl import ioctl
+except ImportError:
+    ioctl = None
+
+copy_file_range = getattr(os, 'copy_file_range', None)
+
+FICLONE = 0x40049409
+
+
+class FilePlacer:
+    strategies = ('copy', 'hardlink', 'reflink', 'move')
+
+    def __init__(self, strategy: str = 'copy') -> None:
+        if strategy not in self.strategies:
+            raise ValueError(f'Estratégia de gravação desconhecida: {strategy}')
+        self.strategy = strategy
+        self.createdFolders: set[str] = set()
+        self.fallbackToCopy = False
+
+    def ensureFolder(self, folder: str) -> None:
+        if folder in self.createdFolders:
+            return
+        makedirs(folder, exist_ok=True)
+        self.createdFolders.add(folder)
+
+    def place(self, source: str, destination: str) -> None:
+        self.ensureFolder(path.dirname(destination))
+        temporaryFile = f'{destination}.{os.getpid()}.tmp'
+        try:
+            if self.strategy == 'move':
+                self.move(source, destination)
+                return
+            if self.strategy == 'hardlink' and not self.fallbackToCopy:
+                self.hardlink(source, temporaryFile)
+            elif self.strategy == 'reflink' and not self.fallbackToCopy:
+                self.reflink(source, temporaryFile)
+            else:
+                self.copy(source, temporaryFile)
+            replace(temporaryFile, destination)
+        finally:
+            if path.exists(temporaryFile):
+                remove(temporaryFile)
+
+    def move(self, source: str, destination: str) -> None:
+        try:
+            replace(source, destination)
+        except OSError as err:
+            if err.errno != errno.EXDEV:
+                raise
+            shutil.move(source, destination)
+
+    def hardlink(self, source: str, destination: str) -> None:
+        try:
+            os.link(source, destination)
+        except OSError as err:
+            if err.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            self.fallbackToCopy = True
+            self.copy(source, destination)
+
+    def reflink(self, source: str, destination: str) -> None:
+        if ioctl is None:
+            self.fallbackToCopy = True
+            self.copy(source, destination)
+            return
+        sourceHandle = os.open(source, os.O_RDONLY)
+        try:
+            destinationHandle = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                ioctl(destinationHandle, FICLONE, sourceHandle)
+                return
+            except OSError as err:
+                if err.errno not in (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL):
+                    raise
+                self.fallbackToCopy = True
+            finally:
+                os.close(destinationHandle)
+        finally:
+            os.close(sourceHandle)
+        self.copy(source, destination)
+
+    def copy(self, source: str, destination: str) -> None:
+        if copy_file_range is None:
+            shutil.copyfile(source, destination)
+            return
+        sourceHandle = os.open(source, os.O_RDONLY)
+        try:
+            destinationHandle = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                remaining = os.fstat(sourceHandle).st_size
+                while remaining > 0:
+                    copied = copy_file_range(sourceHandle, destinationHandle, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return
+            except OSError as err:
+                if err.errno not in (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL):
+                    raise
+            finally:
+                os.close(destinationHandle)
+        finally:
+            os.close(sourceHandle)
+        shutil.copyfile(source, destination)
@@ -0,0 +1,83 @@
+from os import scandir
+from queue import Queue
+from threading import Thread
+from typing import Callable, Iterable, Iterator
+
+
+def hasPDFHeader(file: str) -> bool:
+    with open(file, 'rb') as file_binary:
+        return b'%PDF-' in file_binary.read(1024)
+
+
+class FolderScanner:
+    filters = ('extension', 'magic', 'none')
+
+    def __init__(self, folder: str, fileFilter: str = 'extension',
+                 onError: Callable[[str, OSError], None] | None = None,
+                 onReject: Callable[[str], None] | None = None) -> None:
+        self.folder = folder
+        self.fileFilter = fileFilter
+        self.onError = onError
+        self.onReject = onReject
+        self.found = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.walk(self.folder)
+
+    def walk(self, folder: str) -> Iterator[str]:
+        try:
+            with scandir(folder) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError as err:
+            self.reportError(folder, err)
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    yield from self.walk(entry.path)
+                    continue
+                if not self.accepts(entry.path, entry.name):
+                    self.rejected += 1
+                    if self.onReject is not None:
+                        self.onReject(entry.path)
+                    continue
+            except OSError as err:
+                self.reportError(entry.path, err)
+                continue
+            self.found += 1
+            yield entry.path
+
+    def accepts(self, file: str, name: str) -> bool:
+        if self.fileFilter == 'none':
+            return True
+        if self.fileFilter == 'extension':
+            return name.lower().endswith('.pdf')
+        return hasPDFHeader(file)
+
+    def reportError(self, file: str, err: OSError) -> None:
+        self.errors += 1
+        if self.onError is not None:
+            self.onError(file, err)
+
+
+def scanAhead(paths: Iterable[str], bufferSize: int = 1000) -> Iterator[str]:
+    queue: Queue = Queue(bufferSize)
+    finished = object()
+    failures: list[BaseException] = []
+
+    def produce():
+        try:
+            for file in paths:
+                queue.put(file)
+        except BaseException as err:
+            failures.append(err)
+        finally:
+            queue.put(finished)
+
+    Thread(target=produce, daemon=True).start()
+    while (file := queue.get()) is not finished:
+        yield file
+    if failures:
+        raise failures[0]
@@ -0,0 +1,57 @@
+import json
+from os import path, replace
+
+ROUTES_VERSION = 2
+
+class LayoutStats:
+    def __init__(self, statsFile: str = 'estatisticas_layouts.json', maxRoutes: int = 5000) -> None:
+        self.statsFile = statsFile
+        self.maxRoutes = maxRoutes
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.routes: dict[str, str] = {}
+        self.runHits: dict[str, int] = {}
+        self.runMisses: dict[str, int] = {}
+        if path.exists(statsFile):
+            with open(statsFile, encoding='utf8') as stats:
+                saved = json.load(stats)
+            self.hits = saved.get('hits', {})
+            self.misses = saved.get('misses', {})
+            if saved.get('routesVersion') == ROUTES_VERSION:
+                self.routes = saved.get('routes', {})
+
+    def order(self, names: list[str], fingerprint: str | None = None) -> list[str]:
+        ordered = sorted(names, key=lambda name: self.hits.get(name, 0), reverse=True)
+        routed = self.routes.get(fingerprint) if fingerprint is not None else None
+        if routed in ordered:
+            ordered.remove(routed)
+            ordered.insert(0, routed)
+        return ordered
+
+    def record(self, method: str | None, misses: list[str], fingerprint: str | None = None) -> None:
+        for name in misses:
+            self.misses[name] = self.misses.get(name, 0) + 1
+            self.runMisses[name] = self.runMisses.get(name, 0) + 1
+        if method is None:
+            return
+        self.hits[method] = self.hits.get(method, 0) + 1
+        self.runHits[method] = self.runHits.get(method, 0) + 1
+        if fingerprint is not None:
+            self.routes.pop(fingerprint, None)
+            self.routes[fingerprint] = method
+            while len(self.routes) > self.maxRoutes:
+                del self.routes[next(iter(self.routes))]
+
+    def summary(self) -> str:
+        names = sorted(set(self.runHits) | set(self.runMisses), key=lambda name: self.runHits.get(name, 0), reverse=True)
+        lines = ['Layouts nesta execução (acertos / tentativas falhas):']
+        for name in names:
+            lines.append(f'  {name}: {self.runHits.get(name, 0)} / {self.runMisses.get(name, 0)}')
+        return '\n'.join(lines)
+
+    def save(self) -> None:
+        temporaryFile = self.statsFile + '.tmp'
+        with open(temporaryFile, 'w', encoding='utf8') as stats:
+            json.dump({'hits': self.hits, 'misses': self.misses, 'routes': self.routes,
+                       'routesVersion': ROUTES_VERSION}, stats, ensure_ascii=False)
+        replace(temporaryFile, self.statsFile)
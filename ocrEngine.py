@@ -0,0 +1,42 @@
+import pytesseract
+
+try:
+    from tesserocr import PSM, PyTessBaseAPI
+except ImportError:
+    PyTessBaseAPI = None
+
+OCR_ENGINES = ('auto', 'tesserocr', 'pytesseract')
+
+
+def resolveEngine(engine: str) -> str:
+    if engine == 'auto':
+        return 'tesserocr' if PyTessBaseAPI is not None else 'pytesseract'
+    return engine
+
+
+class OCREngine:
+    def __init__(self, engine: str = 'auto', language: str = 'por') -> None:
+        engine = resolveEngine(engine)
+        if engine not in OCR_ENGINES:
+            raise ValueError(f'Motor de OCR desconhecido: {engine}')
+        if engine == 'tesserocr' and PyTessBaseAPI is None:
+            raise ValueError('Motor de OCR tesserocr indisponível, instale o pacote tesserocr')
+        self.engine = engine
+        self.language = language
+        self.api = None
+
+    def recognizeOne(self, image) -> str:
+        if self.engine == 'pytesseract':
+            return pytesseract.image_to_string(image, config=f'--psm 6 -l {self.language}')
+        if self.api is None:
+            self.api = PyTessBaseAPI(lang=self.language, psm=PSM.SINGLE_BLOCK)
+        self.api.SetImage(image)
+        return self.api.GetUTF8Text()
+
+    def recognize(self, images: list) -> list[str]:
+        return [self.recognizeOne(image) for image in images]
+
+    def close(self) -> None:
+        if self.api is not None:
+            self.api.End()
+            self.api = None
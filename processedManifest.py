@@ -0,0 +1,59 @@
+import json
+from os import path, replace, stat
+from threading import Lock
+
+from extractCache import fileHash
+
+
+class ProcessedManifest:
+    def __init__(self, manifestFile: str = 'manifesto_processados.json') -> None:
+        self.manifestFile = manifestFile
+        self.entries: dict[str, dict] = {}
+        self.lock = Lock()
+        if path.exists(manifestFile):
+            with open(manifestFile, encoding='utf8') as manifest:
+                self.entries = json.load(manifest)
+
+    def isUnchanged(self, file: str) -> bool:
+        entry = self.entries.get(file)
+        if entry is None:
+            return False
+        fileStat = stat(file)
+        if entry['size'] == fileStat.st_size and entry['mtime'] == fileStat.st_mtime:
+            return True
+        if entry['size'] != fileStat.st_size or entry['hash'] != fileHash(file):
+            return False
+        with self.lock:
+            entry['mtime'] = fileStat.st_mtime
+        return True
+
+    def previous(self, file: str) -> dict | None:
+        return self.entries.get(file)
+
+    def entryFor(self, file: str, destination: str, nf_number: str, nf_city: str, hash: str | None = None) -> dict:
+        fileStat = stat(file)
+        return {
+            'size': fileStat.st_size,
+            'mtime': fileStat.st_mtime,
+            'hash': hash or fileHash(file),
+            'destination': destination,
+            'nf_number': nf_number,
+            'nf_city': nf_city,
+        }
+
+    def commit(self, file: str, entry: dict) -> None:
+        with self.lock:
+            self.entries[file] = entry
+
+    def record(self, file: str, destination: str, nf_number: str, nf_city: str, hash: str | None = None) -> None:
+        self.commit(file, self.entryFor(file, destination, nf_number, nf_city, hash))
+
+    def forget(self, file: str) -> None:
+        with self.lock:
+            self.entries.pop(file, None)
+
+    def save(self) -> None:
+        temporaryFile = self.manifestFile + '.tmp'
+        with self.lock, open(temporaryFile, 'w', encoding='utf8') as manifest:
+            json.dump(self.entries, manifest, ensure_ascii=False)
+        replace(temporaryFile, self.manifestFile)
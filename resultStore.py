@@ -0,0 +1,72 @@
+import sqlite3
+import time
+from typing import Iterator
+
+
+def numberValue(nf_number: str) -> int | None:
+    return int(nf_number) if nf_number.isdecimal() else None
+
+
+class ResultStore:
+    def __init__(self, databaseFile: str = 'notas.sqlite3', batchSize: int = 500) -> None:
+        self.databaseFile = databaseFile
+        self.batchSize = batchSize
+        self.pending: list[tuple] = []
+        self.connection = sqlite3.connect(databaseFile, timeout=60)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS notas (
+                source_path TEXT PRIMARY KEY,
+                nf_number TEXT NOT NULL,
+                nf_value INTEGER,
+                city TEXT NOT NULL,
+                hash TEXT,
+                extractor TEXT,
+                timestamp REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS notas_city_value ON notas (city, nf_value);
+            CREATE INDEX IF NOT EXISTS notas_value ON notas (nf_value);
+            CREATE INDEX IF NOT EXISTS notas_hash ON notas (hash);
+        ''')
+
+    def add(self, nf_number: str, city: str, sourcePath: str, hash: str | None = None, extractor: str | None = None) -> None:
+        self.pending.append((sourcePath, nf_number, numberValue(nf_number), city, hash, extractor, time.time()))
+        if len(self.pending) >= self.batchSize:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO notas VALUES (?, ?, ?, ?, ?, ?, ?)', self.pending)
+        self.pending.clear()
+
+    def query(self, city: str | None = None, numberFrom: int | None = None, numberTo: int | None = None,
+              limit: int | None = None) -> Iterator[tuple[str, str, str, str | None, str | None, float]]:
+        self.flush()
+        conditions, parameters = [], []
+        if city is not None:
+            conditions.append('city = ?')
+            parameters.append(city)
+        if numberFrom is not None:
+            conditions.append('nf_value >= ?')
+            parameters.append(numberFrom)
+        if numberTo is not None:
+            conditions.append('nf_value <= ?')
+            parameters.append(numberTo)
+        sql = 'SELECT nf_number, city, source_path, hash, extractor, timestamp FROM notas'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY city, nf_value, nf_number'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            parameters.append(limit)
+        yield from self.connection.execute(sql, parameters)
+
+    def cities(self) -> list[tuple[str, int]]:
+        self.flush()
+        return self.connection.execute('SELECT city, COUNT(*) FROM notas GROUP BY city ORDER BY city').fetchall()
+
+    def close(self) -> None:
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,126 @@
+import csv
+from collections import Counter
+from os import path, replace
+
+import openpyxl
+
+
+class ResultTable:
+    columns = ['Número da nota', 'Cidade', 'Arquivo']
+
+    def __init__(self, csvFile: str, keepRows: bool = False, flushEvery: int = 100, parquetFile: str | None = None) -> None:
+        self.csvFile = csvFile
+        self.flushEvery = flushEvery
+        self.parquetFile = parquetFile
+        self.parquetWriter = None
+        self.pending: list[tuple[str, str, str]] = []
+        exists = keepRows and path.exists(csvFile)
+        self.previousRows = 0
+        self.resumeRows: int | None = None
+        if exists:
+            with open(csvFile, encoding='utf8', newline='') as source:
+                self.previousRows = max(0, sum(1 for _ in csv.reader(source)) - 1)
+        self.rowCount = self.previousRows
+        self.csvHandle = open(csvFile, 'a' if exists else 'w', encoding='utf8', newline='')
+        self.csvWriter = csv.writer(self.csvHandle)
+        if not exists:
+            self.csvWriter.writerow(self.columns)
+
+    def importXlsx(self, xlsxFile: str) -> None:
+        workbook = openpyxl.load_workbook(xlsxFile, read_only=True)
+        for row in workbook.active.iter_rows(min_row=2, values_only=True):
+            if len(row) >= 3 and row[1] is not None:
+                self.append(str(row[1]), str(row[2]), '')
+                self.previousRows += 1
+        workbook.close()
+        self.flush()
+
+    def removeFiles(self, files: set[str], start: int = 0) -> None:
+        if not files:
+            return
+        removed = self.rewriteRows(lambda index, row: start <= index < self.previousRows and len(row) >= 3 and row[2] in files)
+        self.previousRows -= removed
+
+    def removeImportedDuplicates(self) -> None:
+        notes = Counter((row[0], row[1]) for index, row in enumerate(self.rows()) if index >= self.previousRows)
+        if not notes:
+            return
+
+        def duplicate(index: int, row: list[str]) -> bool:
+            if index >= self.previousRows or len(row) < 3 or row[2] != '' or notes[(row[0], row[1])] == 0:
+                return False
+            notes[(row[0], row[1])] -= 1
+            return True
+
+        self.previousRows -= self.rewriteRows(duplicate)
+
+    def filesFrom(self, start: int) -> set[str]:
+        return {row[2] for index, row in enumerate(self.rows()) if index >= start and len(row) >= 3}
+
+    def rewriteRows(self, remove) -> int:
+        self.flush()
+        self.csvHandle.close()
+        temporaryFile = self.csvFile + '.tmp'
+        with open(self.csvFile, encoding='utf8', newline='') as source, open(temporaryFile, 'w', encoding='utf8', newline='') as target:
+            writer = csv.writer(target)
+            reader = csv.reader(source)
+            writer.writerow(next(reader, self.columns))
+            removed = removedBeforeResume = 0
+            for index, row in enumerate(reader):
+                if remove(index, row):
+                    removed += 1
+                    if self.resumeRows is not None and index < self.resumeRows:
+                        removedBeforeResume += 1
+                    continue
+                writer.writerow(row)
+        self.rowCount -= removed
+        if self.resumeRows is not None:
+            self.resumeRows -= removedBeforeResume
+        replace(temporaryFile, self.csvFile)
+        self.csvHandle = open(self.csvFile, 'a', encoding='utf8', newline='')
+        self.csvWriter = csv.writer(self.csvHandle)
+        return removed
+
+    def append(self, nf_number: str, nf_city: str, file: str) -> None:
+        self.pending.append((nf_number, nf_city, file))
+        self.rowCount += 1
+        if len(self.pending) >= self.flushEvery:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.pending:
+            return
+        self.csvWriter.writerows(self.pending)
+        self.csvHandle.flush()
+        if self.parquetFile is not None:
+            self.writeParquet(self.pending)
+        self.pending.clear()
+
+    def writeParquet(self, rows: list[tuple[str, str, str]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        batch = pa.table({column: [row[index] for row in rows] for index, column in enumerate(self.columns)})
+        if self.parquetWriter is None:
+            self.parquetWriter = pq.ParquetWriter(self.parquetFile, batch.schema)
+        self.parquetWriter.write_table(batch)
+
+    def rows(self):
+        self.flush()
+        with open(self.csvFile, encoding='utf8', newline='') as source:
+            reader = csv.reader(source)
+            next(reader, None)
+            yield from reader
+
+    def exportXlsx(self, xlsxFile: str) -> None:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append([None] + self.columns[:2])
+        for index, row in enumerate(self.rows()):
+            sheet.append([index] + row[:2])
+        workbook.save(xlsxFile)
+
+    def close(self) -> None:
+        self.flush()
+        self.csvHandle.close()
+        if self.parquetWriter is not None:
+            self.parquetWriter.close()
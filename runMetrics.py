@@ -0,0 +1,82 @@
+import heapq
+import json
+import time
+from contextlib import contextmanager
+
+
+class RunMetrics:
+    def __init__(self, traceFile: str | None = None, slowestFiles: int = 10, collectOnly: bool = False) -> None:
+        self.collectOnly = collectOnly
+        self.samples: list[tuple[str, float, str | None]] = []
+        self.counters: dict[str, int] = {}
+        self.durations: dict[str, list[float]] = {}
+        self.slowest: list[tuple[float, str]] = []
+        self.slowestFiles = slowestFiles
+        self.trace = open(traceFile, 'a', encoding='utf8') if traceFile is not None else None
+
+    @contextmanager
+    def stage(self, name: str, file: str | None = None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.collectOnly:
+                self.samples.append((name, time.perf_counter() - started, file))
+            else:
+                self.record(name, time.perf_counter() - started, file)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def drain(self) -> dict:
+        drained = {'samples': self.samples, 'counters': self.counters}
+        self.samples = []
+        self.counters = {}
+        return drained
+
+    def merge(self, drained: dict) -> None:
+        for name, amount in drained['counters'].items():
+            self.count(name, amount)
+        for name, seconds, file in drained['samples']:
+            self.record(name, seconds, file)
+
+    def record(self, name: str, seconds: float, file: str | None = None) -> None:
+        self.durations.setdefault(name, []).append(seconds)
+        if file is not None and name == 'extracao':
+            heapq.heappush(self.slowest, (seconds, file))
+            if len(self.slowest) > self.slowestFiles:
+                heapq.heappop(self.slowest)
+        if self.trace is not None:
+            self.trace.write(json.dumps({'stage': name, 'seconds': round(seconds, 6), 'file': file}, ensure_ascii=False) + '\n')
+
+    @staticmethod
+    def percentile(values: list[float], fraction: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    def summary(self) -> str:
+        lines = ['Tempo por etapa (n, total, p50, p95):']
+        for name, values in sorted(self.durations.items()):
+            lines.append(f'  {name}: {len(values)}, {sum(values):.2f}s, '
+                         f'{self.percentile(values, 0.5) * 1000:.1f}ms, {self.percentile(values, 0.95) * 1000:.1f}ms')
+        files = self.counters.get('arquivos', 0)
+        if files:
+            cached = self.counters.get('cache_resultado', 0)
+            lines.append(f'Arquivos: {files}, {cached} com resultado em cache ({cached / files * 100:.1f}%)')
+            lines.append(f'OCR: {self.counters.get("paginas_ocr", 0)} páginas em {files} arquivos '
+                         f'({self.counters.get("arquivos_ocr", 0) / files * 100:.1f}% dos arquivos)')
+            lines.append(f'Modo de texto: {self.counters.get("fallback_agrupado", 0)} arquivos refeitos no modo agrupado, '
+                         f'{self.counters.get("fast_divergente", 0)} layouts com texto rápido divergente')
+        if self.slowest:
+            lines.append('Arquivos mais lentos:')
+            for seconds, file in sorted(self.slowest, reverse=True):
+                lines.append(f'  {seconds:.2f}s {file}')
+        return '\n'.join(lines)
+
+    def close(self) -> None:
+        if self.trace is not None:
+            self.trace.close()
+            self.trace = None
+
+
+metrics = RunMetrics(collectOnly=True)
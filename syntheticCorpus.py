@@ -0,0 +1,89 @@
+import random
+import zlib
+from os import makedirs, path
+
+CITIES = ['Campinas', 'Sorocaba', 'Jundiaí', 'Piracicaba', 'São José dos Campos', 'Ribeirão Preto', 'Santos', 'Bauru']
+
+LAYOUT_LINES = {
+    'layout1': lambda number, city: ['Número da', 'NFS-e', number, 'Local da Prestação', f'{city} - SP'],
+    'layout2': lambda number, city: ['Número:', number, f'Local da Prestação do Serviço: 01/2024 {city} - SP'],
+    'layout3': lambda number, city: ['Número:', number, f'Natureza da Operação: 01/2024 {city} - SP'],
+    'layout5': lambda number, city: [f'Nº {number}', 'MUNÍCIPIO', city],
+    'layout6': lambda number, city: ['Número:', number, 'Endereço Obra:', f'{city} - SP'],
+    'layout7': lambda number, city: ['Número:', number, 'Natureza da Operação:', f'{city} - SP'],
+    'layout8': lambda number, city: ['Número da NFS-e', number, 'Cidade - Estado', f'{city} - SP'],
+    'layout9': lambda number, city: ['Situação', 'Cancelada'],
+}
+
+
+def layoutText(lines: list[str]) -> str:
+    return ''.join(line + '\n\n' for line in lines)
+
+
+def pdfString(text: str) -> bytes:
+    encoded = text.encode('cp1252')
+    return b'(' + encoded.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def buildPDF(content: bytes, resources: bytes, extraObjects: list[bytes]) -> bytes:
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources ' + resources + b' /Contents 4 0 R >>',
+        b'<< /Length ' + str(len(content)).encode() + b' >>\nstream\n' + content + b'\nendstream',
+    ] + extraObjects
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+    xref = len(output)
+    output += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    for offset in offsets:
+        output += f'{offset:010d} 00000 n \n'.encode()
+    output += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    return bytes(output)
+
+
+def textPDF(lines: list[str]) -> bytes:
+    content = bytearray()
+    for index, line in enumerate(lines):
+        content += b'BT /F1 11 Tf 60 ' + str(780 - index * 45).encode() + b' Td ' + pdfString(line + '\n') + b' Tj ET\n'
+    font = (b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding << /Type /Encoding '
+            b'/BaseEncoding /WinAnsiEncoding /Differences [10 /uni000A] >> >>')
+    return buildPDF(bytes(content), b'<< /Font << /F1 5 0 R >> >>', [font])
+
+
+def imagePDF(lines: list[str]) -> bytes:
+    from PIL import Image, ImageDraw, ImageFont
+    width, height = 1240, 1754
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=32)
+    except TypeError:
+        font = ImageFont.load_default()
+    for index, line in enumerate(lines):
+        draw.text((120, 120 + index * 90), line, fill=0, font=font)
+    pixels = zlib.compress(image.tobytes())
+    picture = (f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceGray '
+               f'/BitsPerComponent 8 /Filter /FlateDecode /Length {len(pixels)} >>\nstream\n').encode() + pixels + b'\nendstream'
+    return buildPDF(b'q 595 0 0 842 0 0 cm /Im1 Do Q', b'<< /XObject << /Im1 5 0 R >> >>', [picture])
+
+
+def generateCorpus(folder: str, size: int, ocrRatio: float = 0.02, seed: int = 42) -> list[dict]:
+    makedirs(folder, exist_ok=True)
+    generator = random.Random(seed)
+    layouts = list(LAYOUT_LINES)
+    corpus = []
+    for index in range(size):
+        layout = layouts[index % len(layouts)]
+        number = str(generator.randint(1, 999999))
+        city = generator.choice(CITIES)
+        lines = LAYOUT_LINES[layout](number, city)
+        scanned = generator.random() < ocrRatio
+        file = path.join(folder, f'nfse_{index:06d}.pdf')
+        with open(file, 'wb') as output:
+            output.write(imagePDF(lines) if scanned else textPDF(lines))
+        corpus.append({'file': file, 'layout': layout, 'scanned': scanned, 'text': layoutText(lines)})
+    return corpus